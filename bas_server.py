@@ -5,59 +5,206 @@ Bank Application Server (BAS) - Phase 2 (Three-tier)
 BC Clients <-> BAS (Pyro5) <-> BDB (Pyro5) <-> SQLite
 
 Fixes included:
-- Pyro5 proxy thread ownership: create NEW BDB Proxy per call (thread-safe).
+- Pyro5 proxy thread ownership: pooled BDB Proxies, ownership claimed per call.
 - Pyro5 "doesn't expose any methods": explicitly expose class + RPC methods.
 - get_server_stats now returns 'completed_transfers' for test_client.py.
 """
 
 from __future__ import annotations
 
+import hashlib
+import logging
+import math
+import os
+import queue
+import threading
+import time
 import uuid
 from datetime import datetime, timezone
 
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple
 
 import Pyro5.api
+import Pyro5.errors
 
-from fees import compute_fee
+from fees import compute_fee_cents
+
+logger = logging.getLogger("bas")
+
+# Set BAS_UDS=1 / BDB_UDS=1 to use Unix domain sockets instead of TCP when
+# clients, BAS and BDB run on the same host
+BAS_SOCKET = "/tmp/bas.sock"
+BDB_SOCKET = "/tmp/bdb.sock"
+BDB_URI = (
+    f"PYRO:bank.db@./u:{BDB_SOCKET}" if os.environ.get("BDB_UDS") == "1" else "PYRO:bank.db@localhost:9091"
+)
+
+# Persistent BDB connections shared by BAS handler threads; the multiplex
+# server runs one handler at a time, so it only ever uses a single proxy
+BDB_POOL_SIZE = 8
+
+# Sessions expire this many seconds after login
+SESSION_TTL = 3600
+
+# Upper bound on live sessions; the oldest login is evicted beyond this
+MAX_SESSIONS = 100_000
+
+# get_server_stats tolerates this much staleness (seconds) in BDB counters
+STATS_CACHE_TTL = 2.0
+
+# Fees for common round amounts, computed once at import; other amounts
+# fall through to compute_fee_cents (keys and values are cents)
+_FEE_CACHE: Dict[int, int] = {
+    x * 100: compute_fee_cents(x * 100) for x in (10, 20, 50, 100, 200, 500, 1000, 1500, 2000, 5000, 10000)
+}
+
+# Static error responses shared by every call; returned as-is, never mutated
+_ERR_BAD_TOKEN = {"success": False, "message": "Invalid or expired token"}
+_ERR_LOGOUT_TOKEN = {"success": False, "message": "Invalid token"}
+_ERR_AMOUNT_NOT_NUMBER = {"success": False, "message": "Amount must be a number"}
+_ERR_AMOUNT_NONPOSITIVE = {"success": False, "message": "Amount must be > 0"}
+_ERR_AMOUNT_TOO_LARGE = {"success": False, "message": "Amount is too large"}
+
+# BDB methods that move money; replaying one after a dropped reply could
+# collide with a transfer BDB already committed, so they are never retried
+_NO_RETRY_RPCS = frozenset({
+    "execute_transfer",
+    "execute_transfer_cents",
+    "execute_transfers_batch",
+    "prepare_and_execute_transfer",
+})
+
+
+class _BufferedUUID:
+    """uuid4 source that reads os.urandom in blocks instead of once per UUID."""
+
+    def __init__(self, count: int = 256):
+        self._size = 16 * count
+        self._buf = b""
+        self._pos = 0
+        self._lock = threading.Lock()
+
+    def uuid4(self) -> uuid.UUID:
+        with self._lock:
+            if self._pos >= len(self._buf):
+                self._buf = os.urandom(self._size)
+                self._pos = 0
+            raw = self._buf[self._pos:self._pos + 16]
+            self._pos += 16
+        return uuid.UUID(bytes=raw, version=4)
+
+
+_UUIDS = _BufferedUUID()
+
+
+def _token_key(token: str) -> str:
+    """Session store key: only the SHA-256 of a token is kept in memory."""
+    return hashlib.sha256(token.encode()).hexdigest()
 
 
 @Pyro5.api.expose
 class BankApplicationServer:
-    def __init__(self, bdb_uri: str = "PYRO:bank.db@localhost:9091"):
+    def __init__(self, bdb_uri: str = BDB_URI):
         self.bdb_uri = bdb_uri
-        self.sessions: Dict[str, str] = {}  # token -> user_id
+        # sha256(token) -> (user_id, expires_at); insertion order == expiry order
+        self.sessions: Dict[str, Tuple[str, float]] = {}
+        self._sessions_lock = threading.Lock()
+        # LIFO so the most recently used (already connected) proxy is reused first
+        self._pool: queue.LifoQueue = queue.LifoQueue()
+        self._pool_size = 1 if Pyro5.config.SERVERTYPE == "multiplex" else BDB_POOL_SIZE
+        for _ in range(self._pool_size):
+            self._pool.put(self._new_bdb_proxy())
+        self._stats_cache: tuple = (0.0, None)  # (monotonic time, BDB stats)
+        self._stats_lock = threading.Lock()
 
         self._connect_to_bdb()
 
     # -----------------------------
     # Thread-safe BDB RPC helper
     # -----------------------------
+    def _new_bdb_proxy(self) -> Pyro5.api.Proxy:
+        proxy = Pyro5.api.Proxy(self.bdb_uri)
+        proxy._pyroTimeout = 5
+        proxy._pyroSerializer = "marshal"  # BAS<->BDB payloads are plain dicts/str/float
+        return proxy
+
     def _call_bdb(self, method_name: str, *args, **kwargs) -> Any:
         """
-        Create a NEW Pyro5 Proxy in the current thread for each call.
-        Avoids: "the calling thread is not the owner of this proxy"
+        Borrow a pooled Pyro5 Proxy, keeping its TCP connection open across calls.
+        Claiming ownership avoids: "the calling thread is not the owner of this proxy"
+        A stale connection (e.g. BDB restarted) is reconnected once; read-only
+        calls are then replayed, transfer calls re-raise since BDB may have
+        committed before the connection dropped.
         """
-        proxy = Pyro5.api.Proxy(self.bdb_uri)
-        proxy._pyroTimeout = 5
         try:
-            return getattr(proxy, method_name)(*args, **kwargs)
+            proxy = self._pool.get(timeout=5)
+        except queue.Empty:
+            raise Pyro5.errors.TimeoutError("no BDB connection available") from None
+        try:
+            proxy._pyroClaimOwnership()
+            try:
+                return getattr(proxy, method_name)(*args, **kwargs)
+            except Pyro5.errors.ConnectionClosedError:
+                proxy._pyroReconnect()
+                if method_name in _NO_RETRY_RPCS:
+                    raise
+                return getattr(proxy, method_name)(*args, **kwargs)
         finally:
-            proxy._pyroRelease()
+            self._pool.put(proxy)
+
+    def _warm_bdb_pool(self) -> None:
+        """Connect every pooled proxy up front so first calls skip the handshake."""
+        proxies = [self._pool.get() for _ in range(self._pool_size)]
+        for proxy in proxies:
+            try:
+                proxy._pyroBind()
+            except Pyro5.errors.CommunicationError:
+                pass  # connected lazily on first use instead
+            self._pool.put(proxy)
 
     def _connect_to_bdb(self) -> None:
         try:
             stats = self._call_bdb("get_stats")
-            print("✓ Connected to BDB server")
-            print(f"  - Total users in DB: {stats.get('total_users', 0)}")
-            print(f"  - Total transfers in DB: {stats.get('total_transfers', 0)}")
-            print("✓ BAS Server initialized (Phase 2 - Three-tier)")
+            self._warm_bdb_pool()
+            logger.info("✓ Connected to BDB server")
+            logger.info("  - Total users in DB: %d", stats.get("total_users", 0))
+            logger.info("  - Total transfers in DB: %d", stats.get("total_transfers", 0))
+            logger.info("✓ BAS Server initialized (Phase 2 - Three-tier)")
         except Exception as e:
-            print(f"✗ Failed to connect to BDB server: {e}")
-            print("✓ BAS Server initialized (Phase 2 - Three-tier) [BDB not reachable]")
+            logger.error("✗ Failed to connect to BDB server: %s", e)
+            logger.info("✓ BAS Server initialized (Phase 2 - Three-tier) [BDB not reachable]")
 
     def _require_user(self, token: str) -> Optional[str]:
-        return self.sessions.get(token)
+        if not isinstance(token, str):
+            return None
+        key = _token_key(token)
+        entry = self.sessions.get(key)
+        if entry is None:
+            return None
+        user_id, expires_at = entry
+        if expires_at <= time.monotonic():
+            with self._sessions_lock:
+                self.sessions.pop(key, None)
+            return None
+        return user_id
+
+    def _add_session(self, token: str, user_id: str) -> None:
+        with self._sessions_lock:
+            while len(self.sessions) >= MAX_SESSIONS:
+                del self.sessions[next(iter(self.sessions))]
+            self.sessions[_token_key(token)] = (user_id, time.monotonic() + SESSION_TTL)
+
+    def _purge_expired_sessions(self) -> None:
+        # Every session has the same TTL, so the dict is ordered by expiry
+        now = time.monotonic()
+        with self._sessions_lock:
+            expired = []
+            for key, (_, expires_at) in self.sessions.items():
+                if expires_at > now:
+                    break
+                expired.append(key)
+            for key in expired:
+                del self.sessions[key]
 
     # -----------------------------
     # RPC methods (EXPOSED)
@@ -75,8 +222,8 @@ class BankApplicationServer:
                     "account_id": None,
                 }
 
-            token = str(uuid.uuid4())
-            self.sessions[token] = res["user_id"]
+            token = str(_UUIDS.uuid4())
+            self._add_session(token, res["user_id"])
             return {
                 "success": True,
                 "token": token,
@@ -95,16 +242,17 @@ class BankApplicationServer:
 
     @Pyro5.api.expose
     def logout(self, token: str) -> dict:
-        if token in self.sessions:
-            del self.sessions[token]
+        if self._require_user(token):
+            with self._sessions_lock:
+                self.sessions.pop(_token_key(token), None)
             return {"success": True, "message": "Logged out"}
-        return {"success": False, "message": "Invalid token"}
+        return _ERR_LOGOUT_TOKEN
 
     @Pyro5.api.expose
     def get_balance(self, token: str) -> dict:
         user_id = self._require_user(token)
         if not user_id:
-            return {"success": False, "message": "Invalid or expired token"}
+            return _ERR_BAD_TOKEN
 
         try:
             return self._call_bdb("get_balance", user_id)
@@ -121,58 +269,66 @@ class BankApplicationServer:
     ) -> dict:
         user_id = self._require_user(token)
         if not user_id:
-            return {"success": False, "message": "Invalid or expired token"}
-
-        # Validate amount
-        try:
-            amt = float(amount)
-        except Exception:
-            return {"success": False, "message": "Amount must be a number"}
-
-        if amt <= 0:
-            return {"success": False, "message": "Amount must be > 0"}
+            return _ERR_BAD_TOKEN
+
+        # Validate amount (bool is an int subclass but never a valid amount)
+        if isinstance(amount, (int, float)) and not isinstance(amount, bool):
+            try:
+                amt = float(amount)
+            except OverflowError:
+                return _ERR_AMOUNT_TOO_LARGE
+        elif isinstance(amount, str):
+            try:
+                amt = float(amount)
+            except ValueError:
+                return _ERR_AMOUNT_NOT_NUMBER
+        else:
+            return _ERR_AMOUNT_NOT_NUMBER
+
+        if not math.isfinite(amt):
+            return _ERR_AMOUNT_NOT_NUMBER
+
+        # Money crosses the wire to BDB as integer cents; a finite amount can
+        # still overflow to inf when scaled, and round(inf) would raise
+        scaled = amt * 100
+        if not math.isfinite(scaled):
+            return _ERR_AMOUNT_TOO_LARGE
+        amount_cents = round(scaled)
+        if amount_cents <= 0:
+            return _ERR_AMOUNT_NONPOSITIVE
 
         try:
-            # Recipient exists?
-            exists = self._call_bdb("account_exists", recipient_account_id)
-            if not exists:
-                return {"success": False, "message": "Recipient account not found"}
-
-            recipient = self._call_bdb("get_user_by_account_id", recipient_account_id)
-            recipient_user_id = recipient.get("user_id")
-            if not recipient_user_id:
-                return {"success": False, "message": "Recipient lookup failed"}
-
-            # Prevent self-transfer
-            if recipient_user_id == user_id:
-                return {"success": False, "message": "Self-transfer is not allowed"}
-
-            # Fee calculation (fees.py uses Decimal internally; we return float for client friendliness)
-            fee_dec = compute_fee(amt)
-            fee = float(fee_dec)
-
-            transfer_id = str(uuid.uuid4())
-            from datetime import datetime, timezone
-            timestamp = datetime.now(timezone.utc).isoformat()
+            fee_cents = _FEE_CACHE.get(amount_cents)
+            if fee_cents is None:
+                fee_cents = compute_fee_cents(amount_cents)
+            transfer_id = _UUIDS.uuid4().hex
 
-            # Atomic execution in BDB (transaction inside SQLite)
+            # Recipient lookup, self-transfer check and atomic execution
+            # (transaction inside SQLite) all happen in one BDB round-trip
             res = self._call_bdb(
-                "execute_transfer",
+                "prepare_and_execute_transfer",
                 user_id,
-                recipient_user_id,
-                amt,
-                fee,
+                recipient_account_id,
+                amount_cents,
+                fee_cents,
                 reference,
                 transfer_id,
             )
+            # Cached stats may tolerate outside writers, not our own writes
+            with self._stats_lock:
+                self._stats_cache = (0.0, None)
 
-            # Standardize response for tests/clients
+            # Standardize response for tests/clients; BAS only stamps a time
+            # when BDB rejected the transfer before recording one
             res.setdefault("transfer_id", transfer_id)
-            res.setdefault("timestamp", timestamp)
+            timestamp = res.get("timestamp")
+            if timestamp is None:
+                timestamp = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+                res["timestamp"] = timestamp
 
             if res.get("success"):
-                res.setdefault("fee", fee)
-                res.setdefault("total_deducted", round(amt + fee, 2))
+                res.setdefault("fee", fee_cents / 100)
+                res.setdefault("total_deducted", (amount_cents + fee_cents) / 100)
                 res.setdefault("created_at", timestamp)
 
             return res
@@ -184,20 +340,11 @@ class BankApplicationServer:
     def get_transfer_status(self, token: str, transfer_id: str) -> dict:
         user_id = self._require_user(token)
         if not user_id:
-            return {"success": False, "message": "Invalid or expired token"}
+            return _ERR_BAD_TOKEN
 
         try:
-            res = self._call_bdb("get_transfer", transfer_id)
-            if not res.get("success"):
-                return res
-
-            t = res.get("transfer") or {}
-
-            # Authorization: only sender or recipient can view
-            if t.get("sender_user_id") != user_id and t.get("recipient_user_id") != user_id:
-                return {"success": False, "message": "Unauthorized"}
-
-            return res
+            # Authorization (only sender or recipient can view) is enforced in BDB's SQL
+            return self._call_bdb("get_transfer_for_user", transfer_id, user_id)
         except Exception as e:
             return {"success": False, "message": f"Server error: {e}"}
 
@@ -209,12 +356,20 @@ class BankApplicationServer:
           - active_sessions
           - total_transfers
           - completed_transfers   (this was missing and caused your KeyError)
-        """
-        try:
-            db_stats = self._call_bdb("get_stats")
-        except Exception:
-            db_stats = {"total_users": 0, "total_transfers": 0, "completed_transfers": 0}
 
+        BDB counters are cached for STATS_CACHE_TTL seconds; active_sessions is live.
+        """
+        with self._stats_lock:
+            now = time.monotonic()
+            ts, db_stats = self._stats_cache
+            if db_stats is None or now - ts >= STATS_CACHE_TTL:
+                try:
+                    db_stats = self._call_bdb("get_stats")
+                    self._stats_cache = (now, db_stats)
+                except Exception:
+                    db_stats = {"total_users": 0, "total_transfers": 0, "completed_transfers": 0}
+
+        self._purge_expired_sessions()
         return {
             "total_users": db_stats.get("total_users", 0),
             "active_sessions": len(self.sessions),
@@ -224,39 +379,51 @@ class BankApplicationServer:
 
 
 def main() -> None:
-    print("=" * 70)
-    print("Bank Application Server (BAS) - Phase 2")
-    print("=" * 70)
-    print()
-
+    # Plain-message output by default; operators can reconfigure the "bas" logger
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    logger.info("=" * 70)
+    logger.info("Bank Application Server (BAS) - Phase 2")
+    logger.info("=" * 70)
+    logger.info("")
+
+    # BAS mostly forwards to BDB, so a single select()-based loop beats a
+    # thread per connection. Handlers must not block beyond the 5s BDB timeout.
+    # Set before constructing the server, which sizes its BDB pool from it.
+    Pyro5.config.SERVERTYPE = "multiplex"
     server = BankApplicationServer()
 
-    daemon = Pyro5.api.Daemon(host="localhost", port=9090)
+    if os.environ.get("BAS_UDS") == "1":
+        daemon = Pyro5.api.Daemon(unixsocket=BAS_SOCKET)
+    else:
+        daemon = Pyro5.api.Daemon(host="localhost", port=9090)
     uri = daemon.register(server, objectId="bank.server")
 
-    print()
-    print("=" * 70)
-    print(f"✓ BAS Server ready at: {uri}")
-    print("=" * 70)
-    print()
-    print("Server Details:")
-    print("  - Host: localhost")
-    print("  - Port: 9090")
-    print("  - Object ID: bank.server")
-    print("  - BDB Connection: localhost:9091")
-    print()
-    print("Available RPC Methods:")
-    print("  1. login(username, password)")
-    print("  2. get_balance(token)")
-    print("  3. submit_transfer(token, recipient_account_id, amount, reference)")
-    print("  4. get_transfer_status(token, transfer_id)")
-    print("  5. logout(token)")
-    print("  6. get_server_stats()")
-    print()
-    print("Press Ctrl+C to stop the server")
-    print("=" * 70)
-
-    daemon.requestLoop()
+    logger.info("")
+    logger.info("=" * 70)
+    logger.info("✓ BAS Server ready at: %s", uri)
+    logger.info("=" * 70)
+    logger.info("")
+    logger.info("Server Details:")
+    logger.info("  - Location: %s", daemon.locationStr)
+    logger.info("  - Object ID: bank.server")
+    logger.info("  - Server type: %s", Pyro5.config.SERVERTYPE)
+    logger.info("  - BDB Connection: %s", server.bdb_uri)
+    logger.info("")
+    logger.info("Available RPC Methods:")
+    logger.info("  1. login(username, password)")
+    logger.info("  2. get_balance(token)")
+    logger.info("  3. submit_transfer(token, recipient_account_id, amount, reference)")
+    logger.info("  4. get_transfer_status(token, transfer_id)")
+    logger.info("  5. logout(token)")
+    logger.info("  6. get_server_stats()")
+    logger.info("")
+    logger.info("Press Ctrl+C to stop the server")
+    logger.info("=" * 70)
+
+    # Closing the daemon also removes the Unix socket file when BAS_UDS=1
+    with daemon:
+        daemon.requestLoop()
 
 
 if __name__ == "__main__":
@@ -15,6 +15,7 @@ HOW TO RUN:
    python3 bdb_server.py
 
 3. Server will listen on localhost:9091
+   (or the Unix domain socket /tmp/bdb.sock when BDB_UDS=1)
    Creates/initializes bank.db SQLite database on first run
 
 DATABASE SCHEMA:
@@ -28,16 +29,58 @@ DESIGN NOTES:
 -------------
 - All money stored as INTEGER cents to avoid floating-point issues
 - Atomic transfers using SQLite transactions
+- Long-lived connections: one writer (lock-serialized) + a read-only pool
+- WAL journal mode with synchronous=NORMAL: reads do not block on writes
 - BAS communicates with BDB via RPC only
 - Clients have NO direct access to this server
 """
 
 import Pyro5.api
+import json
+import logging
+import os
+import queue
 import sqlite3
+import threading
 import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Optional, List
-from decimal import Decimal
+from typing import Dict, Iterator, Optional, List
+from urllib.request import pathname2url
+
+# Per-request events are logged at DEBUG; silent unless a handler is configured
+logger = logging.getLogger("bdb")
+logger.addHandler(logging.NullHandler())
+
+# Unix domain socket used instead of localhost:9091 when BDB_UDS=1
+BDB_SOCKET = "/tmp/bdb.sock"
+
+# Read-only SQLite connections kept open for query RPCs
+READ_POOL_SIZE = 4
+
+# Column order of _XFER_SELECT; read-only connections return plain tuples,
+# which are zipped against these names
+_XFER_FIELDS = (
+    "transfer_id", "sender_user_id", "sender_account_id", "sender_username",
+    "recipient_user_id", "recipient_account_id", "recipient_username",
+    "amount", "fee", "status", "reference", "timestamp",
+)
+_XFER_SELECT = """SELECT t.transfer_id, t.sender_user_id, s.account_id, s.username,
+                         t.recipient_user_id, r.account_id, r.username,
+                         t.amount_cents, t.fee_cents, t.status, t.reference, t.created_at"""
+
+# Most queued transfers the writer thread folds into one transaction
+WRITE_BATCH_MAX = 64
+
+
+def _transfer_from_row(row) -> dict:
+    """Shape an _XFER_SELECT row as a transfer dict (amounts in dollars)."""
+    transfer = dict(zip(_XFER_FIELDS, row))
+    transfer["amount"] = row[7] / 100.0
+    transfer["fee"] = row[8] / 100.0
+    transfer["reference"] = row[10] or ""
+    return transfer
 
 
 @Pyro5.api.expose
@@ -52,86 +95,166 @@ class BankDatabaseServer:
     def __init__(self, db_path: str = "bank.db"):
         """Initialize the database server."""
         self.db_path = db_path
+        
+        # One long-lived writer connection (serialized by a lock) plus a pool
+        # of read-only connections, instead of opening bank.db on every RPC
+        self._rw_conn = self._open_connection()
+        self._rw_lock = threading.Lock()
         self._init_database()
+        
+        self._read_pool: Optional[queue.Queue] = None
+        if db_path != ":memory:":
+            self._read_pool = queue.Queue()
+            for _ in range(READ_POOL_SIZE):
+                self._read_pool.put(self._open_connection(readonly=True))
+        
+        # Transfer RPCs hand their work to a single writer thread, which
+        # commits whatever has queued up together (one fsync per batch)
+        self._write_q: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name="bdb-writer", daemon=True)
+        self._writer.start()
+        
         print(f"✓ BDB Server initialized with database: {db_path}")
     
-    def _get_connection(self) -> sqlite3.Connection:
-        """Get a database connection."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
+    def _open_connection(self, readonly: bool = False) -> sqlite3.Connection:
+        """Open a database connection that can be shared across RPC threads."""
+        if readonly:
+            uri = f"file:{pathname2url(os.path.abspath(self.db_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row  # Enable column access by name
+        
+        # Per-connection tuning (journal_mode=WAL is persisted by _init_database)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+        conn.execute("PRAGMA foreign_keys=ON")
+        if self.db_path != ":memory:":
+            conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
         return conn
     
+    @contextmanager
+    def _borrow(self, readonly: bool) -> Iterator[sqlite3.Connection]:
+        """
+        Lend a connection for the duration of a with-block.
+        
+        Read-only callers get a pooled RO connection; writers (and every caller
+        for an in-memory database) get the single RW connection under its lock.
+        """
+        if readonly and self._read_pool is not None:
+            conn = self._read_pool.get()
+            try:
+                yield conn
+            finally:
+                self._read_pool.put(conn)
+        else:
+            with self._rw_lock:
+                yield self._rw_conn
+    
+    def close(self):
+        """Stop the writer thread and close all connections."""
+        self._write_q.put(None)
+        self._writer.join()
+        # Refresh planner stats for tables whose shape changed this session
+        with self._borrow(readonly=False) as conn:
+            conn.execute("PRAGMA optimize")
+        if self._read_pool is not None:
+            while not self._read_pool.empty():
+                self._read_pool.get_nowait().close()
+        self._rw_conn.close()
+    
     def _init_database(self):
         """Create database schema and seed initial data if needed."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Create users table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id TEXT PRIMARY KEY,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    account_id TEXT UNIQUE NOT NULL
-                )
-            """)
-            
-            # Create accounts table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS accounts (
-                    account_id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    balance_cents INTEGER NOT NULL DEFAULT 0,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id)
-                )
-            """)
-            
-            # Create transfers table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS transfers (
-                    transfer_id TEXT PRIMARY KEY,
-                    sender_user_id TEXT NOT NULL,
-                    recipient_user_id TEXT NOT NULL,
-                    amount_cents INTEGER NOT NULL,
-                    fee_cents INTEGER NOT NULL,
-                    status TEXT NOT NULL,
-                    reference TEXT,
-                    created_at TEXT NOT NULL,
-                    FOREIGN KEY (sender_user_id) REFERENCES users(user_id),
-                    FOREIGN KEY (recipient_user_id) REFERENCES users(user_id)
-                )
-            """)
-            
-            # Create audit log table (optional, for tracking)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS audit_log (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    event TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    details TEXT
-                )
-            """)
-            
-            # Check if we need to seed data
-            cursor.execute("SELECT COUNT(*) FROM users")
-            user_count = cursor.fetchone()[0]
-            
-            if user_count == 0:
-                print("  → Seeding initial data...")
-                self._seed_data(cursor)
-            
-            conn.commit()
-            print("  → Database schema initialized")
-            
-        except Exception as e:
-            conn.rollback()
-            print(f"  ✗ Database initialization error: {e}")
-            raise
-        finally:
-            conn.close()
+        with self._borrow(readonly=False) as conn:
+            try:
+                # WAL lets readers run alongside the writer; the mode is stored in
+                # the database file, so setting it once at startup is enough
+                if self.db_path != ":memory:":
+                    conn.execute("PRAGMA journal_mode=WAL")
+                
+                # Create users table
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS users (
+                        user_id TEXT PRIMARY KEY,
+                        username TEXT UNIQUE NOT NULL,
+                        password TEXT NOT NULL,
+                        account_id TEXT UNIQUE NOT NULL
+                    )
+                """)
+                
+                # Create accounts table
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS accounts (
+                        account_id TEXT PRIMARY KEY,
+                        user_id TEXT NOT NULL,
+                        balance_cents INTEGER NOT NULL DEFAULT 0,
+                        FOREIGN KEY (user_id) REFERENCES users(user_id)
+                    )
+                """)
+                
+                # Create transfers table
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS transfers (
+                        transfer_id TEXT PRIMARY KEY,
+                        sender_user_id TEXT NOT NULL,
+                        recipient_user_id TEXT NOT NULL,
+                        amount_cents INTEGER NOT NULL,
+                        fee_cents INTEGER NOT NULL,
+                        status TEXT NOT NULL,
+                        reference TEXT,
+                        created_at TEXT NOT NULL,
+                        FOREIGN KEY (sender_user_id) REFERENCES users(user_id),
+                        FOREIGN KEY (recipient_user_id) REFERENCES users(user_id)
+                    )
+                """)
+                
+                # Indexes for per-user transfer history (newest first)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_xfer_sender
+                    ON transfers(sender_user_id, created_at DESC)
+                """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_xfer_recipient
+                    ON transfers(recipient_user_id, created_at DESC)
+                """)
+                
+                # Create audit log table (optional, for tracking)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS audit_log (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        event TEXT NOT NULL,
+                        timestamp TEXT NOT NULL,
+                        details TEXT
+                    )
+                """)
+                
+                # Check if we need to seed data
+                user_count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+                
+                if user_count == 0:
+                    print("  → Seeding initial data...")
+                    self._seed_data(conn)
+                
+                conn.commit()
+                
+                # Planner statistics: full ANALYZE once on a database that has
+                # never had one, then the cheap incremental PRAGMA optimize
+                has_stats = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+                ).fetchone()
+                if not has_stats:
+                    conn.execute("ANALYZE")
+                conn.execute("PRAGMA optimize")
+                conn.commit()
+                print("  → Database schema initialized")
+                
+            except Exception as e:
+                conn.rollback()
+                print(f"  ✗ Database initialization error: {e}")
+                raise
     
-    def _seed_data(self, cursor):
+    def _seed_data(self, conn):
         """Seed the database with initial users (mock data)."""
         # Mock users
         users = [
@@ -140,34 +263,21 @@ class BankDatabaseServer:
             ("USER003", "timuthu", "TimuthuPass789", "ACC003", 1500000),   # $15,000.00
         ]
         
-        for user_id, username, password, account_id, balance_cents in users:
-            # Insert user
-            cursor.execute(
-                "INSERT INTO users (user_id, username, password, account_id) VALUES (?, ?, ?, ?)",
-                (user_id, username, password, account_id)
-            )
-            
-            # Insert account
-            cursor.execute(
-                "INSERT INTO accounts (account_id, user_id, balance_cents) VALUES (?, ?, ?)",
-                (account_id, user_id, balance_cents)
-            )
-            
+        # Users first: accounts.user_id references users
+        conn.executemany(
+            "INSERT INTO users (user_id, username, password, account_id) VALUES (?, ?, ?, ?)",
+            [(user_id, username, password, account_id)
+             for user_id, username, password, account_id, _ in users]
+        )
+        conn.executemany(
+            "INSERT INTO accounts (account_id, user_id, balance_cents) VALUES (?, ?, ?)",
+            [(account_id, user_id, balance_cents)
+             for user_id, _, _, account_id, balance_cents in users]
+        )
+        
+        for _, username, _, _, balance_cents in users:
             print(f"    ✓ Created user: {username} with balance ${balance_cents / 100:.2f}")
     
-    def _cents_to_decimal(self, cents: int) -> Decimal:
-        """Convert cents (integer) to Decimal dollars."""
-        return Decimal(cents) / Decimal(100)
-    
-    def _decimal_to_cents(self, amount: Decimal) -> int:
-        """Convert Decimal dollars to cents (integer)."""
-        return int(amount * 100)
-    
-    def _float_to_cents(self, amount: float) -> int:
-        """Convert float dollars to cents (integer)."""
-        # Round to 2 decimal places first to avoid float precision issues
-        return int(round(amount * 100))
-    
     @Pyro5.api.expose
     def validate_credentials(self, username: str, password: str) -> dict:
         """
@@ -178,52 +288,43 @@ class BankDatabaseServer:
             password: User's password (plain text for Phase 2 - mock)
         
         Returns:
-            dict: {"success": bool, "user_id": str, "account_id": str, "message": str}
+            dict: {"success": bool, "user_id": str, "account_id": str, "message": str};
+                  failures carry only "success" and "message"
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute(
-                "SELECT user_id, account_id, password FROM users WHERE username = ?",
-                (username,)
-            )
-            row = cursor.fetchone()
-            
-            if not row:
+        with self._borrow(readonly=True) as conn:
+            try:
+                row = conn.execute(
+                    "SELECT user_id, account_id, password FROM users WHERE username = ?",
+                    (username,)
+                ).fetchone()
+                
+                if not row:
+                    return {
+                        "success": False,
+                        "message": "Invalid credentials"
+                    }
+                
+                user_id, account_id, stored_password = row
+                if stored_password != password:
+                    return {
+                        "success": False,
+                        "message": "Invalid credentials"
+                    }
+                
+                logger.debug("✓ Credentials validated for user: %s", username)
+                
                 return {
-                    "success": False,
-                    "user_id": None,
-                    "account_id": None,
-                    "message": "Invalid credentials"
+                    "success": True,
+                    "user_id": user_id,
+                    "account_id": account_id,
+                    "message": "Credentials valid"
                 }
-            
-            if row["password"] != password:
+                
+            except Exception as e:
                 return {
                     "success": False,
-                    "user_id": None,
-                    "account_id": None,
-                    "message": "Invalid credentials"
+                    "message": f"Database error: {str(e)}"
                 }
-            
-            print(f"✓ Credentials validated for user: {username}")
-            
-            return {
-                "success": True,
-                "user_id": row["user_id"],
-                "account_id": row["account_id"],
-                "message": "Credentials valid"
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "user_id": None,
-                "account_id": None,
-                "message": f"Database error: {str(e)}"
-            }
-        finally:
-            conn.close()
     
     @Pyro5.api.expose
     def get_balance(self, user_id: str) -> dict:
@@ -234,50 +335,41 @@ class BankDatabaseServer:
             user_id: User's unique ID
         
         Returns:
-            dict: {"success": bool, "balance": float, "message": str}
+            dict: {"success": bool, "balance": float, "message": str,
+                   "username": str, "account_id": str}; failures carry only
+                  "success" and "message"
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute(
-                """SELECT a.balance_cents, u.username, u.account_id 
-                   FROM accounts a 
-                   JOIN users u ON a.user_id = u.user_id 
-                   WHERE a.user_id = ?""",
-                (user_id,),
-            )
-            row = cursor.fetchone()
-            
-            if not row:
+        with self._borrow(readonly=True) as conn:
+            try:
+                row = conn.execute(
+                    """SELECT a.balance_cents, u.username, u.account_id 
+                       FROM accounts a 
+                       JOIN users u ON a.user_id = u.user_id 
+                       WHERE a.user_id = ?""",
+                    (user_id,),
+                ).fetchone()
+                
+                if not row:
+                    return {
+                        "success": False,
+                        "message": f"User {user_id} not found"
+                    }
+                
+                balance_cents, username, account_id = row
+                
+                return {
+                    "success": True,
+                    "balance": balance_cents / 100.0,  # Convert cents to dollars
+                    "message": "Balance retrieved",
+                    "username": username,
+                    "account_id": account_id
+                }
+                
+            except Exception as e:
                 return {
                     "success": False,
-                    "balance": None,
-                    "message": f"User {user_id} not found",
-                    "username": None,
-                    "account_id": None
+                    "message": f"Database error: {str(e)}"
                 }
-            
-            balance = row["balance_cents"] / 100.0  # Convert cents to dollars
-            
-            return {
-                "success": True,
-                "balance": balance,
-                "message": "Balance retrieved",
-                "username": row["username"],
-                "account_id": row["account_id"]
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "balance": None,
-                "message": f"Database error: {str(e)}",
-                "username": None,
-                "account_id": None
-            }
-        finally:
-            conn.close()
     
     @Pyro5.api.expose
     def account_exists(self, account_id: str) -> bool:
@@ -290,14 +382,11 @@ class BankDatabaseServer:
         Returns:
             bool: True if account exists, False otherwise
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("SELECT 1 FROM accounts WHERE account_id = ?", (account_id,))
-            return cursor.fetchone() is not None
-        finally:
-            conn.close()
+        with self._borrow(readonly=True) as conn:
+            row = conn.execute(
+                "SELECT 1 FROM accounts WHERE account_id = ?", (account_id,)
+            ).fetchone()
+            return row is not None
     
     @Pyro5.api.expose
     def get_user_by_account_id(self, account_id: str) -> Optional[dict]:
@@ -310,29 +399,23 @@ class BankDatabaseServer:
         Returns:
             dict or None: User information if found
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute(
+        with self._borrow(readonly=True) as conn:
+            row = conn.execute(
                 """SELECT u.user_id, u.username, u.account_id 
                    FROM users u 
                    WHERE u.account_id = ?""",
                 (account_id,),
-            )
-            row = cursor.fetchone()
+            ).fetchone()
             
             if not row:
                 return None
             
+            user_id, username, account_id = row
             return {
-                "user_id": row["user_id"],
-                "username": row["username"],
-                "account_id": row["account_id"]
+                "user_id": user_id,
+                "username": username,
+                "account_id": account_id
             }
-            
-        finally:
-            conn.close()
     
     @Pyro5.api.expose
     def execute_transfer(
@@ -343,6 +426,28 @@ class BankDatabaseServer:
         fee: float,
         reference: Optional[str],
         transfer_id: str
+    ) -> dict:
+        """
+        Execute a transfer given dollar amounts.
+        
+        Kept for backward compatibility; converts to cents and forwards to
+        execute_transfer_cents, which new callers should use instead.
+        """
+        return self.execute_transfer_cents(
+            sender_user_id, recipient_user_id,
+            int(round(amount * 100)), int(round(fee * 100)),
+            reference, transfer_id
+        )
+    
+    @Pyro5.api.expose
+    def execute_transfer_cents(
+        self,
+        sender_user_id: str,
+        recipient_user_id: str,
+        amount_cents: int,
+        fee_cents: int,
+        reference: Optional[str],
+        transfer_id: str
     ) -> dict:
         """
         Execute a transfer atomically.
@@ -356,130 +461,352 @@ class BankDatabaseServer:
         Args:
             sender_user_id: Sender's user ID
             recipient_user_id: Recipient's user ID
-            amount: Transfer amount (dollars)
-            fee: Transfer fee (dollars)
+            amount_cents: Transfer amount (integer cents)
+            fee_cents: Transfer fee (integer cents)
             reference: Optional reference message
             transfer_id: Unique transfer ID
         
         Returns:
             dict: {"success": bool, "message": str, "sender_new_balance": float, 
-                   "transfer_id": str, "timestamp": str}
+                   "sender_new_balance_cents": int, "transfer_id": str,
+                   "timestamp": str}; balance fields are omitted when the
+                  sender account does not exist or the transfer errored
+        """
+        return self._submit_transfer({
+            "sender_user_id": sender_user_id,
+            "recipient_user_id": recipient_user_id,
+            "amount_cents": amount_cents,
+            "fee_cents": fee_cents,
+            "reference": reference,
+            "transfer_id": transfer_id
+        })
+    
+    @Pyro5.api.expose
+    def prepare_and_execute_transfer(
+        self,
+        sender_user_id: str,
+        recipient_account_id: str,
+        amount_cents: int,
+        fee_cents: int,
+        reference: Optional[str],
+        transfer_id: str
+    ) -> dict:
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        Resolve the recipient account and execute the transfer in one RPC.
         
-        # Convert to cents for storage
-        amount_cents = self._float_to_cents(amount)
-        fee_cents = self._float_to_cents(fee)
-        total_deduction_cents = amount_cents + fee_cents
+        Replaces the account_exists -> get_user_by_account_id -> execute_transfer
+        sequence BAS used to issue, so a transfer costs a single round-trip.
+        
+        Args:
+            sender_user_id: Sender's user ID
+            recipient_account_id: Recipient's account ID
+            amount_cents: Transfer amount (integer cents)
+            fee_cents: Transfer fee (integer cents)
+            reference: Optional reference message
+            transfer_id: Unique transfer ID
+        
+        Returns:
+            dict: Same shape as execute_transfer_cents; recipient errors are returned
+                  as {"success": False, "message": str, "transfer_id": str}
+        """
+        with self._borrow(readonly=True) as conn:
+            row = conn.execute(
+                "SELECT user_id FROM accounts WHERE account_id = ?",
+                (recipient_account_id,)
+            ).fetchone()
+        
+        if not row:
+            return {
+                "success": False,
+                "message": "Recipient account not found",
+                "transfer_id": transfer_id
+            }
+        
+        recipient_user_id = row[0]
+        if recipient_user_id == sender_user_id:
+            return {
+                "success": False,
+                "message": "Self-transfer is not allowed",
+                "transfer_id": transfer_id
+            }
+        
+        return self._submit_transfer({
+            "sender_user_id": sender_user_id,
+            "recipient_user_id": recipient_user_id,
+            "amount_cents": amount_cents,
+            "fee_cents": fee_cents,
+            "reference": reference,
+            "transfer_id": transfer_id
+        })
+    
+    @Pyro5.api.expose
+    def execute_transfers_batch(self, transfers: List[dict]) -> List[dict]:
+        """
+        Execute many transfers under a single transaction (one commit).
+        
+        Each transfer runs inside its own SAVEPOINT, so a failing row is rolled
+        back and recorded as FAILED without affecting the rest of the batch.
+        
+        Args:
+            transfers: List of dicts keyed like execute_transfer_cents's
+                       arguments (sender_user_id, recipient_user_id,
+                       amount_cents, fee_cents, reference, transfer_id);
+                       dollar "amount"/"fee" keys are still accepted
         
+        Returns:
+            list: One execute_transfer-shaped result per input, in order
+        """
+        return self._run_batch(transfers)
+    
+    def _submit_transfer(self, transfer: dict) -> dict:
+        """Queue a transfer for the writer thread and block until it is committed."""
+        fut: Future = Future()
+        self._write_q.put((fut, transfer))
+        return fut.result()
+    
+    def _writer_loop(self):
+        """
+        Commit queued transfers in batches until close() posts None.
+        
+        Everything already waiting (up to WRITE_BATCH_MAX) joins the current
+        batch; nothing waits for more work, so an idle server adds no latency.
+        """
+        while True:
+            item = self._write_q.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < WRITE_BATCH_MAX:
+                try:
+                    item = self._write_q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write_q.put(None)  # stop after this batch
+                    break
+                batch.append(item)
+            
+            try:
+                results = self._run_batch([transfer for _, transfer in batch])
+            except Exception as e:
+                for fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+            for (fut, _), result in zip(batch, results):
+                fut.set_result(result)
+    
+    def _run_batch(self, transfers: List[dict]) -> List[dict]:
+        """Apply transfers in one BEGIN IMMEDIATE transaction, one savepoint each."""
+        with self._borrow(readonly=False) as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                results = [self._execute_batched_transfer(conn, t) for t in transfers]
+                conn.commit()
+                return results
+            except Exception as e:
+                conn.rollback()
+                return [
+                    {
+                        "success": False,
+                        "message": f"Batch failed: {str(e)}",
+                        "transfer_id": t.get("transfer_id")
+                    }
+                    for t in transfers
+                ]
+    
+    def _execute_batched_transfer(self, conn: sqlite3.Connection, transfer: dict) -> dict:
+        """Run one batch entry inside a savepoint of the open batch transaction."""
+        transfer_id = transfer.get("transfer_id")
         timestamp = datetime.now().isoformat()
         
+        amount_cents = fee_cents = None
+        
+        conn.execute("SAVEPOINT batch_transfer")
         try:
-            # Start transaction (implicit with connection)
+            if "amount_cents" in transfer:
+                amount_cents = transfer["amount_cents"]
+                fee_cents = transfer["fee_cents"]
+            else:
+                amount_cents = int(round(transfer["amount"] * 100))
+                fee_cents = int(round(transfer["fee"] * 100))
+            result = self._execute_transfer_inner(
+                conn,
+                transfer["sender_user_id"],
+                transfer["recipient_user_id"],
+                amount_cents,
+                fee_cents,
+                transfer.get("reference"),
+                transfer_id,
+                timestamp
+            )
+            conn.execute("RELEASE batch_transfer")
+            return result
+        except Exception as e:
+            conn.execute("ROLLBACK TO batch_transfer")
+            conn.execute("RELEASE batch_transfer")
+            
+            self._record_failed_transfer(conn, transfer, amount_cents, fee_cents, timestamp, e)
             
-            # 1. Check sender's balance
-            cursor.execute(
+            return {
+                "success": False,
+                "message": f"Transfer failed: {str(e)}",
+                "transfer_id": transfer_id,
+                "timestamp": timestamp
+            }
+    
+    def _record_failed_transfer(
+        self,
+        conn: sqlite3.Connection,
+        transfer: dict,
+        amount_cents: Optional[int],
+        fee_cents: Optional[int],
+        timestamp: str,
+        error: Exception
+    ):
+        """
+        Record a transfer that errored out (no commit).
+        
+        A FAILED transfers row is preferred, but foreign keys reject one for
+        an unknown recipient and the primary key for a reused transfer_id;
+        those attempts go to audit_log instead.
+        """
+        try:
+            self._insert_transfer(
+                conn, transfer.get("transfer_id"), transfer.get("sender_user_id"),
+                transfer.get("recipient_user_id"), amount_cents, fee_cents, "FAILED",
+                transfer.get("reference"), timestamp
+            )
+            return
+        except sqlite3.Error:
+            pass
+        try:
+            conn.execute(
+                "INSERT INTO audit_log (event, timestamp, details) VALUES (?, ?, ?)",
+                ("TRANSFER_FAILED", timestamp, json.dumps({
+                    "transfer_id": transfer.get("transfer_id"),
+                    "sender_user_id": transfer.get("sender_user_id"),
+                    "recipient_user_id": transfer.get("recipient_user_id"),
+                    "amount_cents": amount_cents,
+                    "fee_cents": fee_cents,
+                    "error": str(error)
+                }))
+            )
+        except sqlite3.Error:
+            logger.exception("Could not record failed transfer %s", transfer.get("transfer_id"))
+    
+    def _execute_transfer_inner(
+        self,
+        conn: sqlite3.Connection,
+        sender_user_id: str,
+        recipient_user_id: str,
+        amount_cents: int,
+        fee_cents: int,
+        reference: Optional[str],
+        transfer_id: str,
+        timestamp: str
+    ) -> dict:
+        """
+        Apply a transfer's writes without committing; the caller owns the
+        transaction. Insufficient funds are recorded as a FAILED row.
+        """
+        total_deduction_cents = amount_cents + fee_cents
+        
+        # 1. Check funds and deduct from sender in one statement; no row comes
+        #    back when the account is missing or the balance is too low
+        rows = conn.execute(
+            """UPDATE accounts SET balance_cents = balance_cents - ?1
+               WHERE user_id = ?2 AND balance_cents >= ?1
+               RETURNING balance_cents""",
+            (total_deduction_cents, sender_user_id)
+        ).fetchall()
+        
+        if not rows:
+            # Failure path only: find out which of the two it was
+            sender_row = conn.execute(
                 "SELECT balance_cents FROM accounts WHERE user_id = ?",
                 (sender_user_id,)
-            )
-            sender_row = cursor.fetchone()
+            ).fetchone()
             
             if not sender_row:
-                conn.rollback()
                 return {
                     "success": False,
                     "message": "Sender account not found",
-                    "sender_new_balance": None,
                     "transfer_id": transfer_id,
                     "timestamp": timestamp
                 }
             
-            sender_balance_cents = sender_row["balance_cents"]
-            
-            # 2. Check sufficient funds
-            if sender_balance_cents < total_deduction_cents:
-                # Record failed transfer
-                cursor.execute(
-                    """INSERT INTO transfers 
-                       (transfer_id, sender_user_id, recipient_user_id, amount_cents, 
-                        fee_cents, status, reference, created_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (transfer_id, sender_user_id, recipient_user_id, amount_cents,
-                     fee_cents, "FAILED", reference or "", timestamp)
-                )
-                conn.commit()
-                
-                return {
-                    "success": False,
-                    "message": f"Insufficient funds: have ${sender_balance_cents / 100:.2f}, need ${total_deduction_cents / 100:.2f}",
-                    "sender_new_balance": sender_balance_cents / 100.0,
-                    "transfer_id": transfer_id,
-                    "timestamp": timestamp
-                }
+            sender_balance_cents = sender_row[0]
             
-            # 3. Deduct from sender
-            new_sender_balance_cents = sender_balance_cents - total_deduction_cents
-            cursor.execute(
-                "UPDATE accounts SET balance_cents = ? WHERE user_id = ?",
-                (new_sender_balance_cents, sender_user_id)
+            # 2. Record failed transfer
+            self._insert_transfer(
+                conn, transfer_id, sender_user_id, recipient_user_id,
+                amount_cents, fee_cents, "FAILED", reference, timestamp
             )
             
-            # 4. Credit recipient
-            cursor.execute(
-                "UPDATE accounts SET balance_cents = balance_cents + ? WHERE user_id = ?",
-                (amount_cents, recipient_user_id)
-            )
-            
-            # 5. Record successful transfer
-            cursor.execute(
-                """INSERT INTO transfers 
-                   (transfer_id, sender_user_id, recipient_user_id, amount_cents, 
-                    fee_cents, status, reference, created_at)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (transfer_id, sender_user_id, recipient_user_id, amount_cents,
-                 fee_cents, "COMPLETED", reference or "", timestamp)
-            )
-            
-            # 6. Commit transaction
-            conn.commit()
-            
-            print(f"✓ Transfer COMPLETED: {transfer_id[:8]}... (${amount:.2f} + ${fee:.2f} fee)")
-            
-            return {
-                "success": True,
-                "message": "Transfer completed successfully",
-                "sender_new_balance": new_sender_balance_cents / 100.0,
-                "transfer_id": transfer_id,
-                "timestamp": timestamp
-            }
-            
-        except Exception as e:
-            conn.rollback()
-            
-            # Try to record failed transfer
-            try:
-                cursor.execute(
-                    """INSERT INTO transfers 
-                       (transfer_id, sender_user_id, recipient_user_id, amount_cents, 
-                        fee_cents, status, reference, created_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (transfer_id, sender_user_id, recipient_user_id, amount_cents,
-                     fee_cents, "FAILED", reference or "", timestamp)
-                )
-                conn.commit()
-            except:
-                pass  # If this fails too, we tried
-            
             return {
                 "success": False,
-                "message": f"Transfer failed: {str(e)}",
-                "sender_new_balance": None,
+                "message": (
+                    f"Insufficient funds: have ${sender_balance_cents / 100:.2f}, "
+                    f"need ${total_deduction_cents / 100:.2f}"
+                ),
+                "sender_new_balance": sender_balance_cents / 100.0,
+                "sender_new_balance_cents": sender_balance_cents,
                 "transfer_id": transfer_id,
                 "timestamp": timestamp
             }
-        finally:
-            conn.close()
+        
+        new_sender_balance_cents = rows[0][0]
+        
+        # 3. Credit recipient; an unknown recipient matches no row, and the
+        #    error rolls the debit back through the caller's savepoint
+        credited = conn.execute(
+            "UPDATE accounts SET balance_cents = balance_cents + ? WHERE user_id = ?",
+            (amount_cents, recipient_user_id)
+        ).rowcount
+        if credited != 1:
+            raise ValueError("Recipient account not found")
+        
+        # 4. Record successful transfer
+        self._insert_transfer(
+            conn, transfer_id, sender_user_id, recipient_user_id,
+            amount_cents, fee_cents, "COMPLETED", reference, timestamp
+        )
+        
+        logger.debug(
+            "✓ Transfer COMPLETED: %s... ($%.2f + $%.2f fee)",
+            transfer_id[:8], amount_cents / 100, fee_cents / 100
+        )
+        
+        return {
+            "success": True,
+            "message": "Transfer completed successfully",
+            "sender_new_balance": new_sender_balance_cents / 100.0,
+            "sender_new_balance_cents": new_sender_balance_cents,
+            "transfer_id": transfer_id,
+            "timestamp": timestamp
+        }
+    
+    def _insert_transfer(
+        self,
+        conn: sqlite3.Connection,
+        transfer_id: str,
+        sender_user_id: str,
+        recipient_user_id: str,
+        amount_cents: int,
+        fee_cents: int,
+        status: str,
+        reference: Optional[str],
+        timestamp: str
+    ):
+        """Insert a transfers row (no commit)."""
+        conn.execute(
+            """INSERT INTO transfers 
+               (transfer_id, sender_user_id, recipient_user_id, amount_cents, 
+                fee_cents, status, reference, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (transfer_id, sender_user_id, recipient_user_id, amount_cents,
+             fee_cents, status, reference or "", timestamp)
+        )
     
     @Pyro5.api.expose
     def get_transfer(self, transfer_id: str) -> dict:
@@ -492,141 +819,127 @@ class BankDatabaseServer:
         Returns:
             dict: Transfer details or error
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        return self._fetch_transfer(
+            "t.transfer_id = ?",
+            (transfer_id,),
+            f"Transfer '{transfer_id}' not found"
+        )
+    
+    @Pyro5.api.expose
+    def get_transfer_for_user(self, transfer_id: str, requesting_user_id: str) -> dict:
+        """
+        Get transfer details by ID, only if the user is its sender or recipient.
         
-        try:
-            cursor.execute(
-                """SELECT t.*, 
-                          s.username as sender_username, s.account_id as sender_account_id,
-                          r.username as recipient_username, r.account_id as recipient_account_id
-                   FROM transfers t
-                   JOIN users s ON t.sender_user_id = s.user_id
-                   JOIN users r ON t.recipient_user_id = r.user_id
-                   WHERE t.transfer_id = ?""",
-                (transfer_id,),
-            )
-            row = cursor.fetchone()
-            
-            if not row:
+        The authorization check runs in SQL, so unauthorized lookups return
+        no transfer data at all.
+        
+        Args:
+            transfer_id: Transfer ID
+            requesting_user_id: User ID asking for the transfer
+        
+        Returns:
+            dict: Transfer details or error
+        """
+        return self._fetch_transfer(
+            "t.transfer_id = ? AND (t.sender_user_id = ? OR t.recipient_user_id = ?)",
+            (transfer_id, requesting_user_id, requesting_user_id),
+            "Not found or unauthorized"
+        )
+    
+    def _fetch_transfer(self, where: str, params: tuple, not_found_message: str) -> dict:
+        """Fetch a single transfer row matching `where` and shape the response."""
+        with self._borrow(readonly=True) as conn:
+            try:
+                row = conn.execute(
+                    f"""{_XFER_SELECT}
+                       FROM transfers t
+                       JOIN users s ON t.sender_user_id = s.user_id
+                       JOIN users r ON t.recipient_user_id = r.user_id
+                       WHERE {where}""",
+                    params,
+                ).fetchone()
+                
+                if not row:
+                    return {
+                        "success": False,
+                        "message": not_found_message
+                    }
+                
+                transfer = _transfer_from_row(row)
+                transfer["total_deducted"] = (row[7] + row[8]) / 100.0
+                
+                return {
+                    "success": True,
+                    "transfer": transfer,
+                    "message": "Transfer retrieved"
+                }
+                
+            except Exception as e:
                 return {
                     "success": False,
-                    "transfer": None,
-                    "message": f"Transfer '{transfer_id}' not found"
+                    "message": f"Database error: {str(e)}"
                 }
-            
-            transfer = {
-                "transfer_id": row["transfer_id"],
-                "sender_user_id": row["sender_user_id"],
-                "sender_account_id": row["sender_account_id"],
-                "sender_username": row["sender_username"],
-                "recipient_user_id": row["recipient_user_id"],
-                "recipient_account_id": row["recipient_account_id"],
-                "recipient_username": row["recipient_username"],
-                "amount": row["amount_cents"] / 100.0,
-                "fee": row["fee_cents"] / 100.0,
-                "total_deducted": (row["amount_cents"] + row["fee_cents"]) / 100.0,
-                "status": row["status"],
-                "reference": row["reference"] or "",
-                "timestamp": row["created_at"]
-            }
-            
-            return {
-                "success": True,
-                "transfer": transfer,
-                "message": "Transfer retrieved"
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "transfer": None,
-                "message": f"Database error: {str(e)}"
-            }
-        finally:
-            conn.close()
     
     @Pyro5.api.expose
-    def list_transfers_for_user(self, user_id: str) -> dict:
+    def list_transfers_for_user(self, user_id: str, limit: int = 100) -> dict:
         """
-        List all transfers for a user (as sender or recipient).
+        List a user's most recent transfers (as sender or recipient).
         
         Args:
             user_id: User ID
+            limit: Maximum number of transfers returned, newest first
         
         Returns:
             dict: List of transfers
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute(
-                """SELECT t.*,
-                          s.username as sender_username, s.account_id as sender_account_id,
-                          r.username as recipient_username, r.account_id as recipient_account_id
-                   FROM transfers t
-                   JOIN users s ON t.sender_user_id = s.user_id
-                   JOIN users r ON t.recipient_user_id = r.user_id
-                   WHERE t.sender_user_id = ? OR t.recipient_user_id = ?
-                   ORDER BY t.created_at DESC""",
-                (user_id, user_id)
-            )
-            
-            rows = cursor.fetchall()
-            transfers = []
-            
-            for row in rows:
-                transfers.append({
-                    "transfer_id": row["transfer_id"],
-                    "sender_user_id": row["sender_user_id"],
-                    "sender_account_id": row["sender_account_id"],
-                    "sender_username": row["sender_username"],
-                    "recipient_user_id": row["recipient_user_id"],
-                    "recipient_account_id": row["recipient_account_id"],
-                    "recipient_username": row["recipient_username"],
-                    "amount": row["amount_cents"] / 100.0,
-                    "fee": row["fee_cents"] / 100.0,
-                    "status": row["status"],
-                    "reference": row["reference"] or "",
-                    "timestamp": row["created_at"]
-                })
-            
-            return {
-                "success": True,
-                "transfers": transfers,
-                "count": len(transfers),
-                "message": f"Found {len(transfers)} transfers"
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "transfers": [],
-                "count": 0,
-                "message": f"Database error: {str(e)}"
-            }
-        finally:
-            conn.close()
+        with self._borrow(readonly=True) as conn:
+            try:
+                # UNION ALL of two indexed lookups instead of an OR that scans
+                # the whole table; the second branch skips self-transfers
+                # already returned by the first
+                rows = conn.execute(
+                    f"""{_XFER_SELECT}
+                       FROM (
+                           SELECT * FROM transfers WHERE sender_user_id = ?1
+                           UNION ALL
+                           SELECT * FROM transfers
+                           WHERE recipient_user_id = ?1 AND sender_user_id != ?1
+                       ) t
+                       JOIN users s ON t.sender_user_id = s.user_id
+                       JOIN users r ON t.recipient_user_id = r.user_id
+                       ORDER BY t.created_at DESC
+                       LIMIT ?2""",
+                    (user_id, limit)
+                ).fetchall()
+                
+                transfers = [_transfer_from_row(row) for row in rows]
+                
+                return {
+                    "success": True,
+                    "transfers": transfers,
+                    "count": len(transfers),
+                    "message": f"Found {len(transfers)} transfers"
+                }
+                
+            except Exception as e:
+                return {
+                    "success": False,
+                    "transfers": [],
+                    "count": 0,
+                    "message": f"Database error: {str(e)}"
+                }
     
     @Pyro5.api.expose
     def get_stats(self) -> dict:
         """Get database statistics."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("SELECT COUNT(*) FROM users")
-            total_users = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM transfers")
-            total_transfers = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM transfers WHERE status = 'COMPLETED'")
-            completed_transfers = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT SUM(balance_cents) FROM accounts")
-            total_balance_cents = cursor.fetchone()[0] or 0
+        with self._borrow(readonly=True) as conn:
+            # All four counters in one statement
+            total_users, total_transfers, completed_transfers, total_balance_cents = conn.execute(
+                """SELECT (SELECT COUNT(*) FROM users),
+                          (SELECT COUNT(*) FROM transfers),
+                          (SELECT COUNT(*) FROM transfers WHERE status = 'COMPLETED'),
+                          (SELECT COALESCE(SUM(balance_cents), 0) FROM accounts)"""
+            ).fetchone()
             
             return {
                 "total_users": total_users,
@@ -634,13 +947,13 @@ class BankDatabaseServer:
                 "completed_transfers": completed_transfers,
                 "total_balance": total_balance_cents / 100.0
             }
-            
-        finally:
-            conn.close()
 
 
 def main():
     """Start the BDB server."""
+    # Per-request DEBUG messages stay off unless the level is lowered here
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     print("=" * 70)
     print("Bank Database Server (BDB) - Phase 2")
     print("=" * 70)
@@ -649,8 +962,13 @@ def main():
     # Create server instance
     server = BankDatabaseServer()
     
-    # Start Pyro5 daemon
-    daemon = Pyro5.api.Daemon(host="localhost", port=9091)
+    # Start Pyro5 daemon; RPC threads come from Pyro5's pool and only block
+    # on the writer thread for transfers, so SQLite writes stay serialized
+    Pyro5.config.SERVERTYPE = "thread"
+    if os.environ.get("BDB_UDS") == "1":
+        daemon = Pyro5.api.Daemon(unixsocket=BDB_SOCKET)
+    else:
+        daemon = Pyro5.api.Daemon(host="localhost", port=9091)
     
     # Register the server object
     uri = daemon.register(server, objectId="bank.db")
@@ -661,10 +979,10 @@ def main():
     print("=" * 70)
     print()
     print("Server Details:")
-    print(f"  - Host: localhost")
-    print(f"  - Port: 9091")
+    print(f"  - Location: {daemon.locationStr}")
     print(f"  - Object ID: bank.db")
     print(f"  - Database: bank.db")
+    print(f"  - Server type: {Pyro5.config.SERVERTYPE}")
     print()
     print("Available RPC Methods:")
     print("  1. validate_credentials(username, password)")
@@ -672,9 +990,14 @@ def main():
     print("  3. account_exists(account_id)")
     print("  4. get_user_by_account_id(account_id)")
     print("  5. execute_transfer(sender_user_id, recipient_user_id, amount, fee, reference, transfer_id)")
-    print("  6. get_transfer(transfer_id)")
-    print("  7. list_transfers_for_user(user_id)")
-    print("  8. get_stats()")
+    print("  6. execute_transfer_cents(sender_user_id, recipient_user_id, amount_cents, fee_cents, reference, transfer_id)")
+    print("  7. prepare_and_execute_transfer(sender_user_id, recipient_account_id,")
+    print("       amount_cents, fee_cents, reference, transfer_id)")
+    print("  8. execute_transfers_batch(transfers)")
+    print("  9. get_transfer(transfer_id)")
+    print("  10. get_transfer_for_user(transfer_id, requesting_user_id)")
+    print("  11. list_transfers_for_user(user_id, limit=100)")
+    print("  12. get_stats()")
     print()
     print("Press Ctrl+C to stop the server")
     print("=" * 70)
@@ -695,6 +1018,10 @@ def main():
         print(f"  - Completed transfers: {stats['completed_transfers']}")
         print(f"  - Total balance: ${stats['total_balance']:,.2f}")
         print()
+    finally:
+        # Also removes the Unix socket file when BDB_UDS=1
+        daemon.close()
+        server.close()
 
 
 if __name__ == "__main__":
@@ -21,33 +21,55 @@ import os
 import sqlite3
 
 
+FETCH_BATCH_SIZE = 10000
+
+
+def _select_with_dollars(cursor, table_name: str) -> str:
+    """
+    Build a SELECT for the table that renders *_cents columns as dollar
+    strings inside SQLite (printf), so rows can be written out unchanged.
+    """
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})")]
+    if not columns:
+        raise sqlite3.OperationalError(f"no such table: {table_name}")
+
+    select_list = []
+    for col in columns:
+        if col.endswith("_cents"):
+            select_list.append(
+                f"CASE WHEN \"{col}\" IS NULL THEN '' "
+                f"ELSE printf('$%.2f', \"{col}\" / 100.0) END AS \"{col}\""
+            )
+        else:
+            select_list.append(f'"{col}"')
+
+    return f"SELECT {', '.join(select_list)} FROM {table_name}"
+
+
 def export_table_to_csv(db_path: str, table_name: str, output_dir: str = "."):
     """
     Export a database table to CSV.
 
+    Rows are streamed in batches of FETCH_BATCH_SIZE, so memory use does not
+    grow with the table size.
+
     Args:
         db_path: Path to SQLite database
         table_name: Name of table to export
         output_dir: Directory to save CSV file
     """
     conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
     try:
-        # Get all rows
-        cursor.execute(f"SELECT * FROM {table_name}")
-        rows = cursor.fetchall()
-
-        if not rows:
-            print(f"  ⚠ Table '{table_name}' is empty")
-            return
+        cursor.execute(_select_with_dollars(cursor, table_name))
 
-        # Get column names
-        column_names = rows[0].keys()
+        # Column names come from the cursor, so empty tables still get a header
+        column_names = [d[0] for d in cursor.description]
 
         # Create CSV file
         csv_path = os.path.join(output_dir, f"{table_name}.csv")
+        row_count = 0
 
         with open(csv_path, "w", newline="", encoding="utf-8") as csvfile:
             writer = csv.writer(csvfile)
@@ -56,21 +78,18 @@ def export_table_to_csv(db_path: str, table_name: str, output_dir: str = "."):
             writer.writerow(column_names)
 
             # Write data rows
-            for row in rows:
-                # Convert balance_cents to dollars for readability
-                row_data = []
-                for i, col_name in enumerate(column_names):
-                    value = row[i]
-
-                    # Convert cents to dollars for display
-                    if col_name.endswith("_cents"):
-                        value = f"${value / 100:.2f}" if value is not None else ""
-
-                    row_data.append(value)
-
-                writer.writerow(row_data)
+            while True:
+                batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+                if not batch:
+                    break
+                writer.writerows(batch)
+                row_count += len(batch)
+
+        if row_count == 0:
+            print(f"  ⚠ Table '{table_name}' is empty (header only written to {csv_path})")
+            return
 
-        print(f"  ✓ Exported {len(rows)} rows to {csv_path}")
+        print(f"  ✓ Exported {row_count} rows to {csv_path}")
 
     except sqlite3.Error as e:
         print(f"  ✗ Error exporting table '{table_name}': {e}")
@@ -9,10 +9,12 @@ Tier schedule (per transfer):
     - $100,000.01+: 0.05%, cap $100.00
 """
 
+import functools
 import math
+from bisect import bisect_left
 from dataclasses import dataclass
-from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional, Sequence
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple
 
 
 @dataclass(frozen=True)
@@ -32,21 +34,89 @@ TIERS: Sequence[FeeTier] = (
 )
 
 
+def _to_cents_table(tiers: Sequence[FeeTier]) -> Tuple[Tuple[Optional[int], int, int, Optional[int]], ...]:
+    """Derive (upper_cents, rate_num, rate_den, cap_cents) rows from the Decimal tiers."""
+    rows = []
+    for tier in tiers:
+        num, den = tier.rate.as_integer_ratio()
+        rows.append((
+            None if tier.upper_bound is None else int(tier.upper_bound * 100),
+            num,
+            den,
+            None if tier.cap is None else int(tier.cap * 100),
+        ))
+    return tuple(rows)
+
+
+# Integer-cent view of TIERS used on the hot path (no Decimal per call)
+_TIERS_CENTS = _to_cents_table(TIERS)
+
+# Sorted upper bounds of every bounded tier; bisecting gives the tier index
+# directly (an amount above all of them falls into the open-ended last tier)
+_UPPER_CENTS = tuple(upper for upper, _, _, _ in _TIERS_CENTS if upper is not None)
+
+# Amounts up to this many cents pay no fee (0 if the first tier is not free)
+_FREE_UPPER_CENTS = _UPPER_CENTS[0] if _TIERS_CENTS[0][1] == 0 else 0
+
+# From this amount (dollars) up, the open-ended top tier's cap always applies.
+# Checked before converting to cents, since amount * 100 overflows to inf for
+# finite amounts near the float maximum.
+_, _TOP_NUM, _TOP_DEN, _TOP_CAP_CENTS = _TIERS_CENTS[-1]
+_CAPPED_FROM = (
+    math.inf if _TOP_CAP_CENTS is None or _TOP_NUM == 0
+    else _TOP_CAP_CENTS * _TOP_DEN / _TOP_NUM / 100
+)
+
+
 def compute_fee(amount: float) -> float:
-    """Calculate the transfer fee for a given amount."""
+    """
+    Calculate the transfer fee for a given amount.
+
+    The amount is first rounded to whole cents with round() (exact half cents
+    go to the even cent), matching the cents BAS sends to BDB. Sub-cent inputs
+    therefore pay the fee of that cent amount: 2000.005 counts as 2000.00 and
+    is free, 2000.015 counts as 2000.02.
+    """
     _validate_amount(amount)
+    return _compute_fee_cached(amount)
+
+
+# Transfer amounts cluster on round values; validation stays outside the
+# cache so invalid inputs are never stored (NaN keys would not hit anyway)
+@functools.lru_cache(maxsize=4096)
+def _compute_fee_cached(amount: float) -> float:
+    return _fee_dollars(amount)
+
+
+def compute_fees(amounts: Sequence[float]) -> List[float]:
+    """Calculate fees for many amounts at once; same results as compute_fee."""
+    for amount in amounts:
+        _validate_amount(amount)
+    return [_fee_dollars(amount) for amount in amounts]
+
+
+def compute_fee_cents(amount_cents: int) -> int:
+    """Calculate the transfer fee in cents for an amount given in cents."""
+    if amount_cents <= 0:
+        raise ValueError("Amount must be greater than 0")
+    return _fee_cents(amount_cents)
+
 
-    amt = Decimal(str(amount))
-    fee = Decimal("0")
+def _fee_dollars(amount: float) -> float:
+    if amount >= _CAPPED_FROM:
+        return _TOP_CAP_CENTS / 100
+    return _fee_cents(round(amount * 100)) / 100
 
-    for tier in TIERS:
-        if tier.upper_bound is None or amt <= tier.upper_bound:
-            fee = amt * tier.rate
-            if tier.cap is not None and fee > tier.cap:
-                fee = tier.cap
-            break
 
-    return float(fee.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+def _fee_cents(cents: int) -> int:
+    if cents <= _FREE_UPPER_CENTS:
+        return 0
+    _, num, den, cap = _TIERS_CENTS[bisect_left(_UPPER_CENTS, cents)]
+    # cents * num / den rounded half up: floor((2*cents*num + den) / (2*den))
+    fee_cents = (2 * cents * num + den) // (2 * den)
+    if cap is not None and fee_cents > cap:
+        fee_cents = cap
+    return fee_cents
 
 
 def _validate_amount(amount: float) -> None:
@@ -23,10 +23,22 @@ ken   / KenPass456 (Balance: $5,000)
 timuthu / TimuthuPass789   (Balance: $15,000)
 """
 
+import os
 import sys
 
 import Pyro5.api
 
+# BAS_UDS=1 talks to a co-located BAS over its Unix domain socket
+BAS_URI = (
+    "PYRO:bank.server@./u:/tmp/bas.sock"
+    if os.environ.get("BAS_UDS") == "1"
+    else "PYRO:bank.server@localhost:9090"
+)
+
+# Bounds every RPC (and so exit) when BAS stops answering; longer than the
+# 5s BAS waits for a BDB connection, so slow transfers still complete
+COMM_TIMEOUT = 10.0
+
 
 class InteractiveBankClient:
     """Interactive banking client."""
@@ -42,7 +54,7 @@ class InteractiveBankClient:
     def connect(self):
         """Connect to BAS server."""
         try:
-            self.server = Pyro5.api.Proxy("PYRO:bank.server@localhost:9090")
+            self.server = Pyro5.api.Proxy(BAS_URI)
             stats = self.server.get_server_stats()
             print("✓ Connected to BAS server")
             print(f"  Active sessions: {stats['active_sessions']}")
@@ -233,6 +245,14 @@ class InteractiveBankClient:
         print("  ken   / KenPass456")
         print("  timuthu / TimuthuPass789")
 
+        # Leaving the with-block releases the connection on every exit path,
+        # including exceptions raised by a menu action
+        with self.server:
+            self._menu_loop()
+        print("✓ Connection closed")
+
+    def _menu_loop(self):
+        """Show the menu and dispatch choices until the user exits."""
         while True:
             self.show_menu()
 
@@ -240,8 +260,6 @@ class InteractiveBankClient:
                 choice = input("\nChoice: ").strip()
             except (KeyboardInterrupt, EOFError):
                 print("\n\nExiting...")
-                self.server._pyroRelease()
-                print("✓ Connection closed")
                 break
 
             if choice == "1":
@@ -258,8 +276,6 @@ class InteractiveBankClient:
                 self.show_stats()
             elif choice == "0":
                 print("\nExiting...")
-                self.server._pyroRelease()
-                print("✓ Connection closed")
                 break
             else:
                 print("\n✗ Invalid choice")
@@ -267,6 +283,7 @@ class InteractiveBankClient:
 
 def main():
     """Main entry point."""
+    Pyro5.config.COMMTIMEOUT = COMM_TIMEOUT
     client = InteractiveBankClient()
     client.run()
 
@@ -0,0 +1,75 @@
+import logging
+import queue
+import sys
+
+import Pyro5.errors
+import pytest
+
+from bas_server import BankApplicationServer
+
+_TOKEN = "test-token"
+
+
+@pytest.fixture
+def server():
+    """BAS with a live session; amount validation fails before any BDB call."""
+    logging.disable(logging.CRITICAL)  # the startup BDB connect is expected to fail
+    try:
+        srv = BankApplicationServer("PYRO:bdb.server@127.0.0.1:1")
+    finally:
+        logging.disable(logging.NOTSET)
+    srv._add_session(_TOKEN, "USER001")
+    return srv
+
+
+def test_oversized_int_amount_is_rejected(server):
+    result = server.submit_transfer(_TOKEN, "ACC002", 10**400)
+    assert result == {"success": False, "message": "Amount is too large"}
+
+
+@pytest.mark.parametrize("amount", [1e307, sys.float_info.max, "1e307"])
+def test_oversized_float_amount_is_rejected(server, amount):
+    result = server.submit_transfer(_TOKEN, "ACC002", amount)
+    assert result == {"success": False, "message": "Amount is too large"}
+
+
+class _DroppingProxy:
+    """Stand-in BDB proxy whose first call loses the connection after the write."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _pyroClaimOwnership(self):
+        pass
+
+    def _pyroReconnect(self):
+        pass
+
+    def __getattr__(self, name):
+        def call(*args):
+            self.calls += 1
+            if self.calls == 1:
+                raise Pyro5.errors.ConnectionClosedError("receiving: not enough data")
+            return {"success": True, "total_users": 1}
+        return call
+
+
+def _with_dropping_proxy(server):
+    proxy = _DroppingProxy()
+    server._pool = queue.LifoQueue()
+    server._pool.put(proxy)
+    return proxy
+
+
+def test_transfer_is_not_replayed_after_connection_drop(server):
+    proxy = _with_dropping_proxy(server)
+    result = server.submit_transfer(_TOKEN, "ACC002", 10)
+    assert result["success"] is False
+    assert result["message"].startswith("Server error:")
+    assert proxy.calls == 1
+
+
+def test_read_only_call_is_replayed_after_connection_drop(server):
+    proxy = _with_dropping_proxy(server)
+    assert server._call_bdb("get_stats") == {"success": True, "total_users": 1}
+    assert proxy.calls == 2
@@ -0,0 +1,150 @@
+import contextlib
+import io
+import json
+import threading
+
+import pytest
+
+from bdb_server import BankDatabaseServer
+
+# Seeded balances (cents) for the three mock users
+_NEO, _KEN, _TIM = "USER001", "USER002", "USER003"
+_SEEDED = {_NEO: 1_000_000, _KEN: 500_000, _TIM: 1_500_000}
+
+
+@pytest.fixture
+def bdb(tmp_path):
+    """Freshly seeded BDB on a temp file; the writer thread is stopped afterwards."""
+    with contextlib.redirect_stdout(io.StringIO()):  # startup banner
+        srv = BankDatabaseServer(str(tmp_path / "bank.db"))
+    yield srv
+    if srv._writer.is_alive():
+        srv.close()
+
+
+def _balance(srv, user_id):
+    with srv._borrow(readonly=True) as conn:
+        return conn.execute(
+            "SELECT balance_cents FROM accounts WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+
+
+def _status(srv, transfer_id):
+    with srv._borrow(readonly=True) as conn:
+        row = conn.execute(
+            "SELECT status FROM transfers WHERE transfer_id = ?", (transfer_id,)
+        ).fetchone()
+    return row[0] if row else None
+
+
+def _audit_events(srv):
+    with srv._borrow(readonly=True) as conn:
+        rows = conn.execute("SELECT event, details FROM audit_log ORDER BY id").fetchall()
+    return [(event, json.loads(details)) for event, details in rows]
+
+
+def _transfer(sender, recipient, amount_cents, fee_cents, transfer_id):
+    return {
+        "sender_user_id": sender,
+        "recipient_user_id": recipient,
+        "amount_cents": amount_cents,
+        "fee_cents": fee_cents,
+        "reference": None,
+        "transfer_id": transfer_id,
+    }
+
+
+def test_successful_transfer_moves_money(bdb):
+    result = bdb.execute_transfer_cents(_NEO, _KEN, 250_000, 625, "rent", "t1")
+    assert result["success"] is True
+    assert result["sender_new_balance_cents"] == _SEEDED[_NEO] - 250_625
+    assert _balance(bdb, _NEO) == _SEEDED[_NEO] - 250_625
+    assert _balance(bdb, _KEN) == _SEEDED[_KEN] + 250_000
+    assert _status(bdb, "t1") == "COMPLETED"
+
+
+def test_insufficient_funds_is_recorded_as_failed(bdb):
+    result = bdb.execute_transfer_cents(_KEN, _NEO, _SEEDED[_KEN], 1, None, "t1")
+    assert result["success"] is False
+    assert result["message"].startswith("Insufficient funds")
+    assert result["sender_new_balance_cents"] == _SEEDED[_KEN]
+    assert _balance(bdb, _KEN) == _SEEDED[_KEN]
+    assert _balance(bdb, _NEO) == _SEEDED[_NEO]
+    assert _status(bdb, "t1") == "FAILED"
+
+
+def test_unknown_recipient_rolls_back_sender_debit(bdb):
+    result = bdb.execute_transfer_cents(_NEO, "NOPE", 10_000, 0, None, "t1")
+    assert result["success"] is False
+    assert "Recipient account not found" in result["message"]
+    assert _balance(bdb, _NEO) == _SEEDED[_NEO]
+    # The recipient foreign key rules out a FAILED transfers row
+    assert _status(bdb, "t1") is None
+    [(event, details)] = _audit_events(bdb)
+    assert event == "TRANSFER_FAILED"
+    assert details["transfer_id"] == "t1"
+    assert details["recipient_user_id"] == "NOPE"
+
+
+def test_duplicate_transfer_id_is_rejected(bdb):
+    assert bdb.execute_transfer_cents(_NEO, _KEN, 10_000, 0, None, "t1")["success"] is True
+    result = bdb.execute_transfer_cents(_NEO, _KEN, 20_000, 0, None, "t1")
+    assert result["success"] is False
+    assert "UNIQUE" in result["message"]
+    # Only the first transfer moved money, and its row is untouched
+    assert _balance(bdb, _NEO) == _SEEDED[_NEO] - 10_000
+    assert _balance(bdb, _KEN) == _SEEDED[_KEN] + 10_000
+    assert _status(bdb, "t1") == "COMPLETED"
+
+
+def test_batch_isolates_failing_entries(bdb):
+    results = bdb.execute_transfers_batch([
+        _transfer(_NEO, _KEN, 10_000, 0, "ok1"),
+        _transfer(_KEN, _NEO, 10_000_000, 0, "poor"),
+        _transfer(_NEO, "NOPE", 10_000, 0, "lost"),
+        _transfer(_TIM, _KEN, 30_000, 75, "ok2"),
+    ])
+    assert [r["transfer_id"] for r in results] == ["ok1", "poor", "lost", "ok2"]
+    assert [r["success"] for r in results] == [True, False, False, True]
+    assert _balance(bdb, _NEO) == _SEEDED[_NEO] - 10_000
+    assert _balance(bdb, _KEN) == _SEEDED[_KEN] + 10_000 + 30_000
+    assert _balance(bdb, _TIM) == _SEEDED[_TIM] - 30_075
+    assert [_status(bdb, t) for t in ("ok1", "poor", "lost", "ok2")] == [
+        "COMPLETED", "FAILED", None, "COMPLETED"
+    ]
+
+
+def test_concurrent_transfers_keep_balances_consistent(bdb):
+    users = list(_SEEDED)
+    threads, per_thread = 8, 25
+    results = []
+    results_lock = threading.Lock()
+
+    def worker(n):
+        for i in range(per_thread):
+            sender = users[(n + i) % 3]
+            recipient = users[(n + i + 1) % 3]
+            res = bdb.execute_transfer_cents(sender, recipient, 1_000 + n, 10, None, f"t{n}-{i}")
+            with results_lock:
+                results.append((sender, recipient, 1_000 + n, res["success"]))
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    assert len(results) == threads * per_thread
+    assert all(ok for *_, ok in results)
+    expected = dict(_SEEDED)
+    for sender, recipient, amount, _ in results:
+        expected[sender] -= amount + 10
+        expected[recipient] += amount
+    assert {u: _balance(bdb, u) for u in users} == expected
+    assert bdb.get_stats()["completed_transfers"] == threads * per_thread
+
+
+def test_close_stops_writer_thread(bdb):
+    assert bdb._writer.is_alive()
+    bdb.close()
+    assert not bdb._writer.is_alive()
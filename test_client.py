@@ -30,11 +30,19 @@ WHAT IT TESTS:
 - PERSISTENCE: Data survives BAS restart (Phase 2 specific)
 """
 
+import os
 import sys
 import time
 
 import Pyro5.api
 
+# BAS_UDS=1 talks to a co-located BAS over its Unix domain socket
+BAS_URI = (
+    "PYRO:bank.server@./u:/tmp/bas.sock"
+    if os.environ.get("BAS_UDS") == "1"
+    else "PYRO:bank.server@localhost:9090"
+)
+
 
 def print_section(title: str):
     """Print a section header."""
@@ -60,16 +68,16 @@ def print_result(operation: str, result: dict, expect_failure: bool = False):
         else:
             status = "✗ UNEXPECTED FAILURE"
 
-    print(f"\n{status}: {operation}")
-    print("-" * 70)
-
+    lines = [f"\n{status}: {operation}", "-" * 70]
     for key, value in result.items():
         if key == "transfer" and isinstance(value, dict):
-            print(f"  {key}:")
-            for sub_key, sub_value in value.items():
-                print(f"    {sub_key}: {sub_value}")
+            lines.append(f"  {key}:")
+            lines.extend(f"    {sub_key}: {sub_value}" for sub_key, sub_value in value.items())
         else:
-            print(f"  {key}: {value}")
+            lines.append(f"  {key}: {value}")
+
+    # One write per result instead of one per key
+    print("\n".join(lines))
 
 
 def main():
@@ -81,7 +89,7 @@ def main():
 
     try:
         # Connect to the BAS server
-        server = Pyro5.api.Proxy("PYRO:bank.server@localhost:9090")
+        server = Pyro5.api.Proxy(BAS_URI)
 
         # Test connection
         stats = server.get_server_stats()
@@ -260,13 +268,17 @@ def main():
     # Test 18: Final Balance Verification
     print_section("TEST 18: Final Balance Verification")
 
-    neo_final = server.get_balance(neo_token)
+    # Both balances in one batched round-trip
+    batch = Pyro5.api.BatchProxy(server)
+    batch.get_balance(neo_token)
+    batch.get_balance(ken_token)
+    neo_final, ken_final = batch()
+
     print(f"\nNeo's Balance:")
     print(f"  Initial: ${neo_initial_balance:,.2f}")
     print(f"  Final:   ${neo_final['balance']:,.2f}")
     print(f"  Change:  ${neo_final['balance'] - neo_initial_balance:,.2f}")
 
-    ken_final = server.get_balance(ken_token)
     print(f"\nKen's Balance:")
     print(f"  Initial: ${ken_initial_balance:,.2f}")
     print(f"  Final:   ${ken_final['balance']:,.2f}")
@@ -297,25 +309,38 @@ def main():
     print("\nNote: Balances and transfers are stored in SQLite (bank.db)")
     print("      Sessions (tokens) are still in-memory and will be lost on BAS restart")
 
-    # Get fresh tokens using CORRECT usernames
-    neo_login = server.login("neo", "NeoPass123")
+    # Get fresh tokens using CORRECT usernames (both logins in one batch)
+    batch = Pyro5.api.BatchProxy(server)
+    batch.login("neo", "NeoPass123")
+    batch.login("ken", "KenPass456")
+    neo_login, ken_login = batch()
+
     if not neo_login.get("success"):
         print(f"\n  ✗ Failed to login as Neo: {neo_login.get('message')}")
         neo_new_token = None
     else:
         neo_new_token = neo_login["token"]
 
-    ken_login = server.login("ken", "KenPass456")
     if not ken_login.get("success"):
         print(f"\n  ✗ Failed to login as Ken: {ken_login.get('message')}")
         ken_new_token = None
     else:
         ken_new_token = ken_login["token"]
 
+    # Fetch balances and the transfer record in one batched round-trip
+    batch = Pyro5.api.BatchProxy(server)
+    if neo_new_token:
+        batch.get_balance(neo_new_token)
+    if ken_new_token:
+        batch.get_balance(ken_new_token)
+    if neo_new_token and transfer_id_1:
+        batch.get_transfer_status(neo_new_token, transfer_id_1)
+    results = batch()
+
     # Verify balances with error handling
     print(f"\nPersistent Balances (from database):")
     if neo_new_token:
-        neo_persistent = server.get_balance(neo_new_token)
+        neo_persistent = next(results)
         if neo_persistent.get("success"):
             print(f"  Neo: ${neo_persistent['balance']:,.2f}")
             if neo_persistent["balance"] == neo_final.get("balance", 0):
@@ -326,7 +351,7 @@ def main():
             print(f"  Neo: Error - {neo_persistent.get('message')}")
 
     if ken_new_token:
-        ken_persistent = server.get_balance(ken_new_token)
+        ken_persistent = next(results)
         if ken_persistent.get("success"):
             print(f"  Ken: ${ken_persistent['balance']:,.2f}")
             if ken_persistent["balance"] == ken_final.get("balance", 0):
@@ -338,7 +363,7 @@ def main():
 
     # Verify transfer history is also persistent
     if neo_new_token and transfer_id_1:
-        transfer_check = server.get_transfer_status(neo_new_token, transfer_id_1)
+        transfer_check = next(results)
         if transfer_check.get("success"):
             print("\n  ✓ Transfer history persisted correctly")
             print(f"    Transfer ID: {transfer_id_1[:8]}...")
@@ -348,14 +373,14 @@ def main():
 
     # Cleanup: Logout all sessions
     print_section("Cleanup: Logout All Sessions")
-    if neo_new_token:
-        result = server.logout(neo_new_token)
-        print_result("Neo logout", result)
-    if ken_new_token:
-        result = server.logout(ken_new_token)
-        print_result("Ken logout", result)
-    result = server.logout(timuthu_token)
-    print_result("Timuthu logout", result)
+    # Independent logouts travel to BAS as one batched request
+    sessions = [("Neo", neo_new_token), ("Ken", ken_new_token), ("Timuthu", timuthu_token)]
+    sessions = [(name, token) for name, token in sessions if token]
+    batch = Pyro5.api.BatchProxy(server)
+    for _, token in sessions:
+        batch.logout(token)
+    for (name, _), result in zip(sessions, batch()):
+        print_result(f"{name} logout", result)
 
     # Summary
     print("\n" + "=" * 70)
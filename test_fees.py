@@ -1,50 +1,68 @@
 import math
+import re
+import sys
 from decimal import Decimal, ROUND_HALF_UP
 
 import pytest
 
-from fees import compute_fee
+from fees import compute_fee, compute_fee_cents, compute_fees
+
+_CENT = Decimal("0.01")
+
+# Error-message patterns, compiled once and shared by the invalid-input tests
+_ERR_GT0 = re.compile("must be greater than 0")
+_ERR_NAN = re.compile("cannot be NaN")
+_ERR_INF = re.compile("cannot be NaN or infinite")
+
+
+# Reference fee policy as (lower, upper] bands; a positive amount falls in
+# exactly one band, so oracle() can sum masked terms instead of branching
+_BANDS = (
+    (Decimal("0"), Decimal("2000.00"), Decimal("0"), Decimal("0")),
+    (Decimal("2000.00"), Decimal("10000.00"), Decimal("0.0025"), Decimal("20.00")),
+    (Decimal("10000.00"), Decimal("20000.00"), Decimal("0.0020"), Decimal("25.00")),
+    (Decimal("20000.00"), Decimal("50000.00"), Decimal("0.00125"), Decimal("40.00")),
+    (Decimal("50000.00"), Decimal("100000.00"), Decimal("0.0008"), Decimal("50.00")),
+    (Decimal("100000.00"), Decimal("Infinity"), Decimal("0.0005"), Decimal("100.00")),
+)
+
+
+def oracle(amount: float) -> Decimal:
+    """Independent Decimal reference for compute_fee, written branch-free."""
+    a = Decimal(str(amount))
+    fee = sum((lo < a <= hi) * min(a * rate, cap) for lo, hi, rate, cap in _BANDS)
+    return fee.quantize(_CENT, rounding=ROUND_HALF_UP)
 
 
 def to_decimal(value: float) -> Decimal:
     """Helper to convert float result to Decimal for precise comparison."""
-    return Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    # Fees are whole cents, so rounding to cents is exact (no str/quantize)
+    return Decimal(round(value * 100)).scaleb(-2)
+
+
+# (id, amount, expected fee in cents); converted to Decimal once at import
+_TIER_CASES = (
+    ("free-tier-minimum", 0.01, 0),
+    ("free-tier-maximum", 2000.00, 0),
+    ("entry-tier-lower-bound", 2000.01, 500),
+    ("entry-tier-mid", 5000.00, 1250),
+    ("entry-tier-cap", 10000.00, 2000),
+    ("mid-tier-lower-bound", 10000.01, 2000),
+    ("mid-tier-cap", 20000.00, 2500),
+    ("upper-mid-tier-lower-bound", 20000.01, 2500),
+    ("upper-mid-tier-cap", 50000.00, 4000),
+    ("high-tier-lower-bound", 50000.01, 4000),
+    ("high-tier-cap", 100000.00, 5000),
+    ("top-tier-lower-bound", 100000.01, 5000),
+    ("top-tier-cap", 500000.00, 10000),
+    ("top-tier-large-amount", 1_000_000_000.00, 10000),
+)
 
 
 @pytest.mark.parametrize(
     ("amount", "expected"),
-    [
-        (0.01, Decimal("0.00")),
-        (2000.00, Decimal("0.00")),
-        (2000.01, Decimal("5.00")),
-        (5000.00, Decimal("12.50")),
-        (10000.00, Decimal("20.00")),
-        (10000.01, Decimal("20.00")),
-        (20000.00, Decimal("25.00")),
-        (20000.01, Decimal("25.00")),
-        (50000.00, Decimal("40.00")),
-        (50000.01, Decimal("40.00")),
-        (100000.00, Decimal("50.00")),
-        (100000.01, Decimal("50.00")),
-        (500000.00, Decimal("100.00")),
-        (1_000_000_000.00, Decimal("100.00")),
-    ],
-    ids=[
-        "free-tier-minimum",
-        "free-tier-maximum",
-        "entry-tier-lower-bound",
-        "entry-tier-mid",
-        "entry-tier-cap",
-        "mid-tier-lower-bound",
-        "mid-tier-cap",
-        "upper-mid-tier-lower-bound",
-        "upper-mid-tier-cap",
-        "high-tier-lower-bound",
-        "high-tier-cap",
-        "top-tier-lower-bound",
-        "top-tier-cap",
-        "top-tier-large-amount",
-    ],
+    [(amount, cents * _CENT) for _, amount, cents in _TIER_CASES],
+    ids=[case_id for case_id, _, _ in _TIER_CASES],
 )
 def test_fee_tiers(amount, expected):
     assert to_decimal(compute_fee(amount)) == expected
@@ -53,10 +71,10 @@ def test_fee_tiers(amount, expected):
 @pytest.mark.parametrize(
     ("amount", "message"),
     [
-        (0, "must be greater than 0"),
-        (-100.00, "must be greater than 0"),
-        (math.nan, "cannot be NaN"),
-        (math.inf, "cannot be NaN or infinite"),
+        (0, _ERR_GT0),
+        (-100.00, _ERR_GT0),
+        (math.nan, _ERR_NAN),
+        (math.inf, _ERR_INF),
     ],
 )
 def test_invalid_inputs(amount, message):
@@ -67,9 +85,68 @@ def test_invalid_inputs(amount, message):
 @pytest.mark.parametrize(
     ("amount", "expected"),
     [
-        (2000.01, Decimal("5.00")),
-        (3333.33, Decimal("8.33")),
+        (2000.01, 500 * _CENT),
+        (3333.33, 833 * _CENT),
     ],
 )
 def test_rounding(amount, expected):
     assert to_decimal(compute_fee(amount)) == expected
+
+
+@pytest.mark.parametrize(
+    ("amount", "expected"),
+    [
+        (2000.005, 0 * _CENT),
+        (2000.015, 500 * _CENT),
+    ],
+    ids=["half-cent-rounds-to-free-tier", "half-cent-rounds-into-entry-tier"],
+)
+def test_sub_cent_amounts_use_rounded_cents(amount, expected):
+    assert to_decimal(compute_fee(amount)) == expected
+
+
+@pytest.mark.parametrize("amount", [200000.00, 1e307, sys.float_info.max])
+def test_huge_amounts_pay_top_cap(amount):
+    assert compute_fee(amount) == 100.00
+    assert compute_fees([amount]) == [100.00]
+
+
+def test_oracle_matches_tier_table():
+    assert [oracle(amount) for _, amount, _ in _TIER_CASES] == [
+        cents * _CENT for _, _, cents in _TIER_CASES
+    ]
+
+
+def test_matches_oracle_across_tiers():
+    boundaries = [2000.00, 10000.00, 20000.00, 50000.00, 100000.00]
+    amounts = [b + delta for b in boundaries for delta in (-0.01, 0.0, 0.01)]
+    amounts += [cents / 100 for cents in range(1, 30_000_000, 9_973)]
+    for amount in amounts:
+        assert to_decimal(compute_fee(amount)) == oracle(amount), amount
+
+
+def test_all_tiers_batch():
+    amounts = [amount for _, amount, _ in _TIER_CASES]
+    expected = [cents * _CENT for _, _, cents in _TIER_CASES]
+    assert [to_decimal(fee) for fee in compute_fees(amounts)] == expected
+
+
+def test_batch_matches_scalar():
+    amounts = [0.01, 1500.00, 2000.01, 3333.33, 10000.01, 20000.00, 50000.01, 100000.01, 1_000_000_000.00]
+    assert compute_fees(amounts) == [compute_fee(amount) for amount in amounts]
+
+
+def test_batch_rejects_invalid_amount():
+    with pytest.raises(ValueError, match=_ERR_GT0):
+        compute_fees([100.00, 0])
+
+
+def test_cents_matches_dollars():
+    amounts = [0.01, 1500.00, 2000.01, 3333.33, 10000.01, 20000.00, 50000.01, 100000.01, 1_000_000_000.00]
+    for amount in amounts:
+        assert compute_fee_cents(round(amount * 100)) / 100 == compute_fee(amount)
+
+
+def test_cents_rejects_nonpositive():
+    with pytest.raises(ValueError, match=_ERR_GT0):
+        compute_fee_cents(0)
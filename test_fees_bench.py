@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from fees import compute_fee, compute_fee_cents
+
+# Mean per-call ceiling; the integer-cent path runs well under 1 µs, the
+# headroom absorbs noisy shared CI runners
+MAX_MEAN_SECONDS = 10e-6
+
+
+def _assert_fast(benchmark, fn, arg):
+    # --benchmark-disable and xdist runs call fn once and record no stats
+    if benchmark.disabled:
+        pytest.skip("benchmark timing disabled")
+    benchmark(fn, arg)
+    assert benchmark.stats["mean"] < MAX_MEAN_SECONDS
+
+
+@pytest.mark.parametrize(
+    "amount",
+    [1500.00, 5000.00, 75000.00],
+    ids=["free_tier", "percentage", "capped"],
+)
+def test_bench_compute_fee(benchmark, amount):
+    _assert_fast(benchmark, compute_fee, amount)
+
+
+@pytest.mark.parametrize(
+    "amount_cents",
+    [150_000, 500_000, 7_500_000],
+    ids=["free_tier", "percentage", "capped"],
+)
+def test_bench_compute_fee_cents(benchmark, amount_cents):
+    _assert_fast(benchmark, compute_fee_cents, amount_cents)